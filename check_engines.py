@@ -0,0 +1,100 @@
+# check_engines.py
+"""
+Consistency checks for the optimised run modes of PensionTrustModel.
+
+1. Step mode must reproduce baseline_trajectories.csv bit for bit. The file
+   holds per-step Avg_Trust / Participation_Rate of the original model
+   (before active-set compaction), including runs that do not collapse.
+2. Event-driven and step mode use different random streams, so they are
+   compared on seed-averaged final metrics for a low-spillover case and a
+   collapse case.
+
+Run after any change to the model dynamics (e.g. a broker-switching rule):
+    python check_engines.py
+Exits with status 1 if a check fails.
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+from model import PensionTrustModel, run_model
+
+BASELINE_PATH = "baseline_trajectories.csv"
+
+# (label, spillover_fraction, initial_trust, num_steps)
+ENGINE_CASES = [
+    ("low spillover", 0.03, 0.6, 150),
+    ("collapse", 0.5, 0.6, 50),
+]
+ENGINE_SEEDS = 30
+ENGINE_TOLERANCE = 0.02  # Max gap between seed-averaged final metrics
+
+
+def check_step_mode_against_baseline():
+    """Return the number of baseline runs step mode fails to reproduce exactly."""
+    # round_trip parsing so the stored floats compare bit for bit
+    baseline = pd.read_csv(BASELINE_PATH, float_precision="round_trip")
+    runs = baseline.groupby(["spillover_fraction", "initial_trust", "seed"])
+    failures = 0
+    for (sp_frac, init_trust, seed), expected in runs:
+        model = PensionTrustModel(
+            num_citizens=200,
+            num_brokers=5,
+            initial_trust=init_trust,
+            spillover_enabled=(sp_frac > 0),
+            spillover_fraction=sp_frac,
+            seed=int(seed)
+        )
+        for _ in range(len(expected)):
+            model.step()
+        actual = model.datacollector.get_model_vars_dataframe()
+        cols = ["Avg_Trust", "Participation_Rate"]
+        if not np.array_equal(actual[cols].to_numpy(), expected[cols].to_numpy()):
+            print(f"❌ Step mode differs from baseline: spillover={sp_frac}, "
+                  f"initial_trust={init_trust}, seed={seed}")
+            failures += 1
+    print(f"{'✅' if not failures else '❌'} Step mode vs baseline: "
+          f"{runs.ngroups - failures} of {runs.ngroups} runs identical")
+    return failures
+
+
+def check_event_mode_against_step_mode():
+    """Return the number of cases where seed-averaged finals differ too much."""
+    failures = 0
+    for label, sp_frac, init_trust, num_steps in ENGINE_CASES:
+        means = {}
+        for event_driven in (False, True):
+            finals = [
+                run_model({
+                    "num_citizens": 500,
+                    "num_brokers": 5,
+                    "initial_trust": init_trust,
+                    "spillover_fraction": sp_frac,
+                    "pause_threshold": 0.2,
+                    "trust_decrement": 0.1,
+                    "num_steps": num_steps,
+                    "seed": seed
+                }, event_driven=event_driven)
+                for seed in range(ENGINE_SEEDS)
+            ]
+            means[event_driven] = pd.DataFrame(finals).mean()
+        gap = (means[True] - means[False]).abs()
+        ok = (gap <= ENGINE_TOLERANCE).all()
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {label}: step "
+              f"trust={means[False]['final_trust']:.4f} part={means[False]['participation_rate']:.4f} | "
+              f"event trust={means[True]['final_trust']:.4f} part={means[True]['participation_rate']:.4f}")
+    return failures
+
+
+def main():
+    failures = check_step_mode_against_baseline() + check_event_mode_against_step_mode()
+    if failures:
+        print(f"❌ {failures} check(s) failed")
+        sys.exit(1)
+    print("✅ All engine checks passed")
+
+
+if __name__ == "__main__":
+    main()
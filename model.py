@@ -5,8 +5,19 @@ Key features:
 - Citizens can switch brokers but cannot withdraw funds (locked-in).
 - Citizens may pause contributions if trust falls below threshold.
 - Spillover: punishment of one broker affects trust in others.
+
+Two run modes share the same dynamics:
+- Step mode (default): every step draws a spillover hit for each citizen.
+- Event-driven mode (event_driven=True): each citizen's waiting time to
+  the next hit is sampled from a geometric distribution and kept in a
+  bucketed calendar, so a step only touches citizens that are hit; the
+  reporters read running totals instead of scanning citizens.
+  Participation and switching are therefore only re-evaluated for hit
+  citizens (and for everyone on the first step), so both decisions must
+  depend only on the citizen's own trust for the modes to agree.
 """
 
+import math
 import random
 import numpy as np
 from mesa import Agent, Model
@@ -33,24 +44,45 @@ class Citizen(Agent):
     def __init__(self, unique_id, model, broker_id, initial_trust):
         super().__init__(unique_id, model)
         self.broker_id = broker_id
+        self.paused_slot = None  # Index into model.paused_trust once paused
         self.trust = initial_trust
         self.is_active = True  # True = still contributing; False = paused (but account locked)
 
+    @property
+    def trust(self):
+        """Current trust; paused citizens keep theirs in the model's paused store."""
+        if self.paused_slot is None:
+            return self._trust
+        return float(self.model.paused_trust[self.paused_slot])
+
+    @trust.setter
+    def trust(self, value):
+        if self.paused_slot is None:
+            self._trust = value
+        else:
+            self.model.paused_trust[self.paused_slot] = value
+
     def decide_participation(self):
         """Pause contributions if trust too low."""
-        if self.is_active and self.trust < 0.2:
+        if self.is_active and self.trust < self.model.pause_threshold:
             self.is_active = False
 
     def maybe_switch_broker(self):
-        """Switch to another broker if still active and conditions met."""
+        """
+        Switch to another broker if still active and conditions met.
+
+        Event-driven mode only calls this for citizens hit on the current
+        step, so any rule added here must depend only on the citizen's own
+        trust; otherwise step_events must visit every active citizen.
+        """
         if not self.is_active:
             return  # Paused citizens don't switch
         
         # Simple switching rule: not implemented here for focus on spillover
         # Could add later based on neighbor trust or performance
 
-    def update_trust_after_punishment(self, spillover_fraction):
-        """Update trust when a broker is punished."""
+    def update_trust_after_punishment(self, spillover_fraction, draw=None):
+        """Update trust when a broker is punished (draw: pre-drawn random number)."""
         if spillover_fraction <= 0:
             return
 
@@ -60,8 +92,8 @@ class Citizen(Agent):
         
         # Simulate random selection of affected citizens per broker
         # For simplicity: use global random draw
-        if random.random() < spillover_fraction:
-            self.trust = max(0.0, self.trust - 0.1)
+        if (random.random() if draw is None else draw) < spillover_fraction:
+            self.trust = max(0.0, self.trust - self.model.trust_decrement)
 
 
 class PensionTrustModel(Model):
@@ -72,6 +104,9 @@ class PensionTrustModel(Model):
         initial_trust=0.6,
         spillover_enabled=False,
         spillover_fraction=1.0,
+        pause_threshold=0.2,
+        trust_decrement=0.1,
+        event_driven=False,
         seed=None
     ):
         super().__init__()
@@ -84,6 +119,10 @@ class PensionTrustModel(Model):
         self.initial_trust = initial_trust
         self.spillover_enabled = spillover_enabled
         self.spillover_fraction = spillover_fraction
+        self.pause_threshold = pause_threshold  # Trust below this pauses contributions
+        self.trust_decrement = trust_decrement  # Trust lost per spillover hit
+        self.event_driven = event_driven
+        self.current_step = 0
 
         self.schedule = RandomActivation(self)
         self.running = True
@@ -105,43 +144,192 @@ class PensionTrustModel(Model):
                 self.schedule.add(citizen)
                 citizen_id += 1
 
+        # Active set: citizens still contributing, compacted as they pause.
+        # Paused citizens never reactivate, so they move to a frozen store
+        # whose trust is kept in one array and updated in bulk.
+        self.brokers = [a for a in self.schedule.agents if isinstance(a, Broker)]
+        self.active_citizens = [a for a in self.schedule.agents if isinstance(a, Citizen)]
+        self.paused_citizens = []
+        # Preallocated so pausing costs O(newly paused); see paused_trust / paused_index
+        self._paused_trust = np.empty(self.num_citizens)
+        self._paused_index = np.empty(self.num_citizens, dtype=int)
+
+        # Event-driven mode: step -> citizens hit on that step. Trust only
+        # ever drops by trust_decrement from initial_trust, so the citizens
+        # fall into a few trust levels; counting them keeps Avg_Trust O(levels).
+        self.event_calendar = {}
+        self.active_position = {}
+        self.trust_level_counts = {}
+        if self.event_driven:
+            self.active_position = {c: i for i, c in enumerate(self.active_citizens)}
+            self.trust_level_counts = {self.initial_trust: len(self.active_citizens)}
+            self.schedule_spillover_events(self.active_citizens)
+
         # Data collector
         self.datacollector = DataCollector(
             model_reporters={
-                "Avg_Trust": lambda m: np.mean([
-                    a.trust for a in m.schedule.agents if isinstance(a, Citizen)
-                ]),
-                "Participation_Rate": lambda m: np.mean([
-                    float(a.is_active) for a in m.schedule.agents if isinstance(a, Citizen)
-                ])
+                "Avg_Trust": lambda m: m.average_trust(),
+                "Participation_Rate": lambda m: len(m.active_citizens) / m.num_citizens
             }
         )
 
+    @property
+    def paused_trust(self):
+        """Trust of paused citizens, aligned with paused_citizens."""
+        return self._paused_trust[:len(self.paused_citizens)]
+
+    @property
+    def paused_index(self):
+        """Position of each paused citizen in creation order."""
+        return self._paused_index[:len(self.paused_citizens)]
+
+    def pause_citizens(self, citizens):
+        """Move newly paused citizens from the active set to the frozen store."""
+        if not citizens:
+            return
+        start = len(self.paused_citizens)
+        stop = start + len(citizens)
+        self._paused_trust[start:stop] = [c.trust for c in citizens]
+        self._paused_index[start:stop] = [c.unique_id - self.num_brokers for c in citizens]
+        for slot, citizen in enumerate(citizens, start):
+            citizen.paused_slot = slot
+        self.paused_citizens.extend(citizens)
+
+    def update_paused_trust(self, draws):
+        """Bulk version of Citizen.update_trust_after_punishment for paused citizens."""
+        if self.spillover_fraction <= 0 or not self.paused_trust.any():
+            return  # No spillover, or everyone paused is already at zero trust
+        hit = np.asarray(draws)[self.paused_index] < self.spillover_fraction
+        self.paused_trust[:] = np.maximum(0.0, self.paused_trust - hit * self.trust_decrement)
+
+    def average_trust(self):
+        """Mean citizen trust (from trust-level counts in event-driven mode)."""
+        if self.event_driven:
+            return math.fsum(
+                level * count for level, count in self.trust_level_counts.items()
+            ) / self.num_citizens
+        # Rebuild creation order so the mean sums exactly as a scan over all citizens would
+        trust = np.empty(self.num_citizens)
+        trust[[a.unique_id - self.num_brokers for a in self.active_citizens]] = [
+            a.trust for a in self.active_citizens
+        ]
+        trust[self.paused_index] = self.paused_trust
+        return np.mean(trust)
+
+    def schedule_spillover_events(self, citizens):
+        """Book each citizen's next spillover hit in the event calendar."""
+        if not self.spillover_enabled or self.spillover_fraction <= 0 or not citizens:
+            return
+        # Per-step hits are Bernoulli(spillover_fraction), so the wait is geometric (>= 1)
+        waits = np.random.geometric(min(self.spillover_fraction, 1.0), len(citizens))
+        for citizen, wait in zip(citizens, waits.tolist()):
+            self.event_calendar.setdefault(self.current_step + wait, []).append(citizen)
+
     def step(self):
         """Advance the model by one step."""
+        self.current_step += 1
+
         # Reset all brokers
-        for agent in self.schedule.agents:
-            if isinstance(agent, Broker):
-                agent.reset()
+        for broker in self.brokers:
+            broker.reset()
 
         # Randomly select one broker to punish (simulate scandal)
-        broker_agents = [a for a in self.schedule.agents if isinstance(a, Broker)]
-        punished_broker = self.random.choice(broker_agents)
+        punished_broker = self.random.choice(self.brokers)
         punished_broker.commit_misconduct()
 
-        # Update citizen trust
-        for agent in self.schedule.agents:
-            if isinstance(agent, Citizen):
-                if self.spillover_enabled:
-                    agent.update_trust_after_punishment(self.spillover_fraction)
-                # Note: even without spillover, direct punishment could reduce trust
-                # But for focus, we assume only spillover matters
-
-        # Citizens decide participation and switching
-        for agent in self.schedule.agents:
-            if isinstance(agent, Citizen):
-                agent.decide_participation()
-                agent.maybe_switch_broker()
+        if self.event_driven:
+            self.step_events()
+        else:
+            self.step_all_citizens()
 
         # Collect data
-        self.datacollector.collect(self)
\ No newline at end of file
+        self.datacollector.collect(self)
+
+    def step_events(self):
+        """Event-driven update: only citizens hit on this step are touched."""
+        hit = self.event_calendar.pop(self.current_step, [])
+        counts = self.trust_level_counts
+        for citizen in hit:
+            old_trust = citizen.trust
+            citizen.trust = max(0.0, old_trust - self.trust_decrement)
+            counts[old_trust] -= 1
+            if not counts[old_trust]:
+                del counts[old_trust]
+            counts[citizen.trust] = counts.get(citizen.trust, 0) + 1
+
+        # Only hit citizens can newly cross the threshold, except on the first
+        # step where citizens may start below it
+        to_check = list(self.active_citizens) if self.current_step == 1 else hit
+        newly_paused = []
+        for citizen in to_check:
+            if citizen.is_active:
+                citizen.decide_participation()
+                citizen.maybe_switch_broker()
+                if not citizen.is_active:
+                    newly_paused.append(citizen)
+        for citizen in newly_paused:
+            self.remove_active(citizen)
+        self.pause_citizens(newly_paused)
+
+        # Citizens at zero trust can lose no more, so they leave the calendar
+        self.schedule_spillover_events([c for c in hit if c.trust > 0])
+
+    def remove_active(self, citizen):
+        """O(1) removal from active_citizens (event-driven mode; order is not kept)."""
+        position = self.active_position.pop(citizen)
+        last = self.active_citizens.pop()
+        if last is not citizen:
+            self.active_citizens[position] = last
+            self.active_position[last] = position
+
+    def step_all_citizens(self):
+        """Step-mode update: every citizen is visited each step."""
+        # Update citizen trust
+        if self.spillover_enabled and self.spillover_fraction > 0:
+            # One draw per citizen in creation order, exactly as when every
+            # citizen drew its own, so seeded runs keep the same random stream
+            draws = [random.random() for _ in range(self.num_citizens)]
+            for citizen in self.active_citizens:
+                citizen.update_trust_after_punishment(
+                    self.spillover_fraction, draws[citizen.unique_id - self.num_brokers]
+                )
+            self.update_paused_trust(draws)
+        # Note: even without spillover, direct punishment could reduce trust
+        # But for focus, we assume only spillover matters
+
+        # Active citizens decide participation and switching; compact the active set
+        still_active = []
+        newly_paused = []
+        for citizen in self.active_citizens:
+            citizen.decide_participation()
+            citizen.maybe_switch_broker()
+            (still_active if citizen.is_active else newly_paused).append(citizen)
+        self.active_citizens = still_active
+        self.pause_citizens(newly_paused)
+
+def run_model(params, event_driven=False):
+    """
+    Build a PensionTrustModel from a parameter dict, run it for
+    ``params["num_steps"]`` steps and return its final metrics.
+
+    Shared by the experiment and sensitivity-analysis scripts so a new
+    model parameter only has to be threaded through here.
+    """
+    model = PensionTrustModel(
+        num_citizens=int(params["num_citizens"]),
+        num_brokers=int(params["num_brokers"]),
+        initial_trust=params["initial_trust"],
+        spillover_enabled=(params["spillover_fraction"] > 0),
+        spillover_fraction=params["spillover_fraction"],
+        pause_threshold=params["pause_threshold"],
+        trust_decrement=params["trust_decrement"],
+        event_driven=event_driven,
+        seed=params.get("seed")
+    )
+    for _ in range(int(params["num_steps"])):
+        model.step()
+    last = model.datacollector.get_model_vars_dataframe().iloc[-1]
+    return {
+        "final_trust": last["Avg_Trust"],
+        "participation_rate": last["Participation_Rate"]
+    }
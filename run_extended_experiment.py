@@ -1,35 +1,301 @@
 # run_extended_experiment.py
+"""
+Full factorial experiment: spillover_fraction × initial_trust × 30 reps.
+
+Run locally (same as before):
+    python run_extended_experiment.py
+
+Or split the sweep across machines that share a directory:
+    python run_extended_experiment.py manifest /shared/sweep --shard-size 30
+    python run_extended_experiment.py work /shared/sweep      # on every node
+    python run_extended_experiment.py merge /shared/sweep
+
+Workers claim shards by atomically creating a lock file, so any number of
+them can run against the same directory without a coordinating service.
+A worker refreshes its lock after every run; with --stale-after, locks left
+by crashed workers are taken over once they stop being refreshed.
+"""
+
+import argparse
+import json
 import os
+import socket
+import time
+import uuid
+
 import pandas as pd
-from model import PensionTrustModel
-
-os.makedirs("data", exist_ok=True)
-results = []
-
-for sp_frac in [0.0, 0.5, 1.0]:
-    for init_trust in [0.3, 0.6, 0.9]:
-        for rep in range(30):
-            model = PensionTrustModel(
-                num_citizens=100,
-                num_brokers=5,
-                initial_trust=init_trust,
-                spillover_enabled=(sp_frac > 0),
-                spillover_fraction=sp_frac,
-                seed=rep + int(sp_frac * 1000) + int(init_trust * 100)
-            )
-            # 手动运行50步
-            for _ in range(50):
-                model.step()
-            # 获取最终数据
-            data = model.datacollector.get_model_vars_dataframe()
-            last = data.iloc[-1]
-            results.append({
-                "spillover_fraction": sp_frac,
-                "initial_trust": init_trust,
-                "final_trust": last["Avg_Trust"],
-                "participation_rate": last["Participation_Rate"]
-            })
-
-df = pd.DataFrame(results)
-df.to_csv("data/extended_experiment_all_runs.csv", index=False)
-print("✅ Done! File saved to data/extended_experiment_all_runs.csv")
\ No newline at end of file
+from model import run_model
+
+NUM_CITIZENS = 100
+NUM_BROKERS = 5
+NUM_STEPS = 50
+PAUSE_THRESHOLD = 0.2
+TRUST_DECREMENT = 0.1
+
+SPILLOVER_FRACTIONS = [0.0, 0.5, 1.0]
+INITIAL_TRUSTS = [0.3, 0.6, 0.9]
+REPETITIONS = 30
+
+OUTPUT_PATH = "data/extended_experiment_all_runs.csv"
+RESULT_COLUMNS = ["spillover_fraction", "initial_trust", "final_trust", "participation_rate"]
+
+
+def build_run_specs():
+    """One spec (parameters plus seed) per run, in the standard table order."""
+    specs = []
+    for sp_frac in SPILLOVER_FRACTIONS:
+        for init_trust in INITIAL_TRUSTS:
+            for rep in range(REPETITIONS):
+                specs.append({
+                    "run_id": len(specs),
+                    "spillover_fraction": sp_frac,
+                    "initial_trust": init_trust,
+                    "rep": rep,
+                    "seed": rep + int(sp_frac * 1000) + int(init_trust * 100),
+                    "num_citizens": NUM_CITIZENS,
+                    "num_brokers": NUM_BROKERS,
+                    "num_steps": NUM_STEPS,
+                    "pause_threshold": PAUSE_THRESHOLD,
+                    "trust_decrement": TRUST_DECREMENT
+                })
+    return specs
+
+
+def run_spec(spec):
+    """Run a single spec and return its row of the run table."""
+    return {
+        "run_id": spec["run_id"],
+        "spillover_fraction": spec["spillover_fraction"],
+        "initial_trust": spec["initial_trust"],
+        **run_model(spec)
+    }
+
+
+def run_local():
+    """Run the whole sweep in this process and write the run table."""
+    os.makedirs("data", exist_ok=True)
+    df = pd.DataFrame([run_spec(spec) for spec in build_run_specs()])
+    df[RESULT_COLUMNS].to_csv(OUTPUT_PATH, index=False)
+    print(f"✅ Done! File saved to {OUTPUT_PATH}")
+
+
+# ───────────────────────
+# Sharded mode (shared directory layout)
+#   manifest.json         run specs grouped into shards
+#   locks/shard_XXXX.lock claimed by a worker (token, host, pid, time)
+#   results/shard_XXXX.csv finished shard
+#   locks/.clock          touched to read the filesystem's clock
+# ───────────────────────
+def _shard_name(shard_id):
+    return f"shard_{shard_id:04d}"
+
+
+def write_manifest(sweep_dir, shard_size):
+    """Write the run specs of the sweep, grouped into shards, to sweep_dir."""
+    if shard_size < 1:
+        raise ValueError(f"shard_size must be at least 1, got {shard_size}")
+    manifest_path = os.path.join(sweep_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        raise FileExistsError(f"{manifest_path} already exists; use a fresh sweep directory")
+    os.makedirs(os.path.join(sweep_dir, "locks"), exist_ok=True)
+    os.makedirs(os.path.join(sweep_dir, "results"), exist_ok=True)
+
+    specs = build_run_specs()
+    shards = [specs[i:i + shard_size] for i in range(0, len(specs), shard_size)]
+    manifest = {
+        "num_runs": len(specs),
+        "shards": [{"shard_id": i, "runs": runs} for i, runs in enumerate(shards)]
+    }
+    tmp_path = f"{manifest_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, manifest_path)
+    print(f"📝 Manifest: {len(specs)} runs in {len(shards)} shards → {manifest_path}")
+
+
+def load_manifest(sweep_dir):
+    with open(os.path.join(sweep_dir, "manifest.json")) as f:
+        return json.load(f)
+
+
+def _filesystem_now(directory):
+    """
+    Current time as stamped by the filesystem holding directory.
+
+    Lock mtimes are set by the file server, so ages are measured against a
+    file touched just now on the same filesystem rather than this host's
+    clock, which may be skewed relative to the other nodes.
+    """
+    clock_path = os.path.join(directory, ".clock")
+    with open(clock_path, "a"):
+        pass
+    os.utime(clock_path)
+    return os.path.getmtime(clock_path)
+
+
+def _lock_age(path):
+    return _filesystem_now(os.path.dirname(path)) - os.path.getmtime(path)
+
+
+def _try_claim(lock_path, stale_after=None):
+    """
+    Atomically create lock_path and return the unique token written to it,
+    or None if another worker holds the shard.
+
+    With stale_after, a lock whose mtime is older than that many seconds
+    (no heartbeat, so its worker is presumed dead) is taken over.
+    """
+    token = uuid.uuid4().hex
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        if stale_after is None:
+            return None
+        aside_path = f"{lock_path}.stale.{token}"
+        try:
+            if _lock_age(lock_path) < stale_after:
+                return None
+            os.rename(lock_path, aside_path)
+            # Another worker may have replaced the stale lock with a fresh one
+            # between our mtime check and the rename; if so, put it back.
+            # os.link never overwrites, so a lock created meanwhile is kept.
+            if _lock_age(aside_path) < stale_after:
+                try:
+                    os.link(aside_path, lock_path)
+                except FileExistsError:
+                    pass
+                os.remove(aside_path)
+                return None
+            os.remove(aside_path)
+        except FileNotFoundError:
+            return None
+        return _try_claim(lock_path)
+    with os.fdopen(fd, "w") as f:
+        json.dump({"token": token, "host": socket.gethostname(), "pid": os.getpid(),
+                   "time": time.time()}, f)
+    return token
+
+
+def _owns_lock(lock_path, token):
+    """True if lock_path still carries our token (it may have been taken over)."""
+    try:
+        with open(lock_path) as f:
+            return json.load(f).get("token") == token
+    except (FileNotFoundError, ValueError):
+        return False
+
+
+def work(sweep_dir, stale_after=None):
+    """Claim and run unfinished shards until none are left."""
+    manifest = load_manifest(sweep_dir)
+    done = 0
+    for shard in manifest["shards"]:
+        name = _shard_name(shard["shard_id"])
+        result_path = os.path.join(sweep_dir, "results", f"{name}.csv")
+        lock_path = os.path.join(sweep_dir, "locks", f"{name}.lock")
+        if os.path.exists(result_path):
+            continue
+        token = _try_claim(lock_path, stale_after)
+        if token is None:
+            continue
+        if os.path.exists(result_path):
+            continue  # Finished by another worker between our check and claim
+
+        print(f"🧪 {name}: {len(shard['runs'])} runs")
+        rows = []
+        try:
+            for spec in shard["runs"]:
+                rows.append(run_spec(spec))
+                if not _owns_lock(lock_path, token):
+                    break
+                try:
+                    os.utime(lock_path)  # Heartbeat so the lock does not look stale
+                except FileNotFoundError:
+                    break  # Taken over between the ownership check and the heartbeat
+        except BaseException:
+            # Release the shard so other workers can pick it up right away
+            if _owns_lock(lock_path, token):
+                os.remove(lock_path)
+            raise
+        if not _owns_lock(lock_path, token):
+            print(f"⚠️ {name}: lock taken over by another worker, dropping results")
+            continue
+
+        # Write under a temporary name, then rename, so readers never see a partial file.
+        # Runs are seeded, so a late duplicate write from a taken-over worker is identical.
+        df = pd.DataFrame(rows)
+        tmp_path = f"{result_path}.{uuid.uuid4().hex}.tmp"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, result_path)
+        done += 1
+    print(f"✅ Worker finished: {done} shards run on {socket.gethostname()}")
+
+
+def merge(sweep_dir, output_path=OUTPUT_PATH):
+    """Check every shard is finished and combine them into the standard run table."""
+    manifest = load_manifest(sweep_dir)
+    frames = []
+    missing = []
+    for shard in manifest["shards"]:
+        name = _shard_name(shard["shard_id"])
+        result_path = os.path.join(sweep_dir, "results", f"{name}.csv")
+        if not os.path.exists(result_path):
+            missing.append(name)
+            continue
+        df = pd.read_csv(result_path)
+        expected = {spec["run_id"] for spec in shard["runs"]}
+        if set(df["run_id"]) != expected or len(df) != len(expected):
+            raise ValueError(f"{result_path} does not match its manifest entry")
+        frames.append(df)
+    if missing:
+        raise RuntimeError(f"{len(missing)} shards not finished: {', '.join(missing)}")
+
+    df = pd.concat(frames, ignore_index=True).sort_values("run_id")
+    if len(df) != manifest["num_runs"]:
+        raise ValueError(f"Expected {manifest['num_runs']} runs, found {len(df)}")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    df[RESULT_COLUMNS].to_csv(output_path, index=False)
+    print(f"✅ Merged {len(frames)} shards ({len(df)} runs) into {output_path}")
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("manifest", help="Write the sweep manifest to a shared directory")
+    p.add_argument("sweep_dir")
+    p.add_argument("--shard-size", type=_positive_int, default=REPETITIONS)
+
+    p = sub.add_parser("work", help="Claim and run shards from a shared directory")
+    p.add_argument("sweep_dir")
+    p.add_argument("--stale-after", type=float, default=None,
+                   help="Take over locks not refreshed for this many seconds (crashed "
+                        "workers). Workers refresh their lock after every run, so this "
+                        "must be longer than the slowest single run. Ages are "
+                        "measured with the shared filesystem's clock, not the "
+                        "local one, so host clock skew does not matter")
+
+    p = sub.add_parser("merge", help="Combine finished shards into the run table")
+    p.add_argument("sweep_dir")
+    p.add_argument("--output", default=OUTPUT_PATH)
+
+    args = parser.parse_args()
+    if args.command == "manifest":
+        write_manifest(args.sweep_dir, args.shard_size)
+    elif args.command == "work":
+        work(args.sweep_dir, args.stale_after)
+    elif args.command == "merge":
+        merge(args.sweep_dir, args.output)
+    else:
+        run_local()
+
+
+if __name__ == "__main__":
+    main()
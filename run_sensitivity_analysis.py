@@ -0,0 +1,233 @@
+# run_sensitivity_analysis.py
+"""
+Global sensitivity analysis of the pension trust ABM.
+
+Instead of nested loops over a handful of values, this script draws a
+Latin-hypercube or Sobol design over all model parameters, runs it in
+batches (through the event-driven engine by default, the fastest one for
+low-spillover runs) and estimates first-order (S1) and total (ST) Sobol
+indices with bootstrap confidence intervals.
+
+Design follows Saltelli (2010): two base matrices A and B plus one matrix
+AB_i per parameter, i.e. N * (k + 2) runs for k parameters. All runs built
+from the same base row share a seed (common random numbers).
+
+Outputs:
+- data/sensitivity_runs.csv     (one row per model run)
+- data/sensitivity_indices.csv  (S1 / ST with bootstrap intervals)
+
+Usage:
+    python run_sensitivity_analysis.py --design sobol --n-base 256 --workers 4
+"""
+
+import argparse
+import os
+from functools import partial
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+
+from model import run_model
+
+# ───────────────────────
+# Parameter space: name -> (low, high, is_integer)
+# ───────────────────────
+PARAMETERS = {
+    "spillover_fraction": (0.0, 1.0, False),
+    "initial_trust": (0.1, 1.0, False),
+    "pause_threshold": (0.05, 0.5, False),
+    "trust_decrement": (0.01, 0.2, False),
+    "num_brokers": (2, 10, True),
+    "num_citizens": (50, 200, True),
+    "num_steps": (10, 100, True),
+}
+
+OUTPUTS = ["final_trust", "participation_rate"]
+
+
+def _run_row(row, event_driven=True):
+    """Pool worker: unpack a design row (dict with 'seed') and run it."""
+    params = {name: row[name] for name in PARAMETERS}
+    params["seed"] = int(row["seed"])
+    return run_model(params, event_driven=event_driven)
+
+
+# ───────────────────────
+# Design generation
+# ───────────────────────
+def scale_unit_sample(unit):
+    """Map unit-cube points onto PARAMETERS, flooring integer parameters."""
+    scaled = np.empty_like(unit)
+    for j, (low, high, is_integer) in enumerate(PARAMETERS.values()):
+        if is_integer:
+            # Equal-width bins so both endpoints are reachable
+            scaled[:, j] = np.minimum(low + np.floor(unit[:, j] * (high - low + 1)), high)
+        else:
+            scaled[:, j] = low + unit[:, j] * (high - low)
+    return scaled
+
+
+def generate_design(n_base, design="sobol", seed=0):
+    """
+    Build the Saltelli design.
+
+    Returns a DataFrame with one row per run and columns
+    ``matrix`` ("A", "B" or the AB_i parameter name), ``base_row``,
+    ``seed`` and one column per parameter.
+    """
+    k = len(PARAMETERS)
+    if design == "sobol":
+        m = int(np.ceil(np.log2(n_base)))
+        if 2 ** m != n_base:
+            print(f"⚠️ Sobol design needs a power of two; using n_base={2 ** m}")
+        unit = qmc.Sobol(d=2 * k, scramble=True, seed=seed).random_base2(m)
+    elif design == "lhs":
+        unit = qmc.LatinHypercube(d=2 * k, seed=seed).random(n_base)
+    else:
+        raise ValueError(f"Unknown design '{design}' (expected 'sobol' or 'lhs')")
+
+    n = unit.shape[0]
+    A = scale_unit_sample(unit[:, :k])
+    B = scale_unit_sample(unit[:, k:])
+
+    names = list(PARAMETERS)
+    blocks = [("A", A), ("B", B)]
+    for i, name in enumerate(names):
+        AB = A.copy()
+        AB[:, i] = B[:, i]
+        blocks.append((name, AB))
+
+    frames = []
+    for label, matrix in blocks:
+        frame = pd.DataFrame(matrix, columns=names)
+        frame.insert(0, "matrix", label)
+        frame.insert(1, "base_row", np.arange(n))
+        frame.insert(2, "seed", seed * 1_000_000 + np.arange(n))
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+# ───────────────────────
+# Batched execution
+# ───────────────────────
+def run_design(design_df, batch_size=256, workers=1, out_path=None, event_driven=True):
+    """
+    Run every row of the design in batches.
+
+    Each finished batch is appended to ``out_path`` (if given), so a long
+    sweep leaves partial results behind if interrupted.
+    """
+    records = design_df.to_dict("records")
+    worker = partial(_run_row, event_driven=event_driven)
+    results = []
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            if pool is not None:
+                outputs = pool.map(worker, batch)
+            else:
+                outputs = [worker(row) for row in batch]
+            batch_df = pd.DataFrame([{**row, **out} for row, out in zip(batch, outputs)])
+            results.append(batch_df)
+            if out_path is not None:
+                batch_df.to_csv(out_path, mode="a" if start else "w", header=(start == 0), index=False)
+            print(f"🧪 Batch {start // batch_size + 1}: "
+                  f"{min(start + batch_size, len(records))}/{len(records)} runs")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return pd.concat(results, ignore_index=True)
+
+
+# ───────────────────────
+# Sobol indices
+# ───────────────────────
+def sobol_indices(f_A, f_B, f_AB):
+    """
+    First-order (Saltelli 2010) and total (Jansen 1999) Sobol indices.
+
+    ``f_A`` and ``f_B`` have shape (N,), ``f_AB`` has shape (k, N).
+    Returns (S1, ST) arrays of length k; NaN if the output has no variance.
+    """
+    var = np.var(np.concatenate([f_A, f_B]), ddof=1)
+    if not var > 0:
+        nan = np.full(f_AB.shape[0], np.nan)
+        return nan, nan.copy()
+    S1 = np.mean(f_B * (f_AB - f_A), axis=1) / var
+    ST = 0.5 * np.mean((f_A - f_AB) ** 2, axis=1) / var
+    return S1, ST
+
+
+def analyze(runs_df, n_bootstrap=1000, confidence=0.95, seed=0):
+    """Compute S1 / ST with percentile bootstrap intervals for each output."""
+    rng = np.random.default_rng(seed)
+    names = list(PARAMETERS)
+    alpha = (1 - confidence) / 2
+    rows = []
+
+    for output in OUTPUTS:
+        wide = runs_df.pivot(index="base_row", columns="matrix", values=output)
+        f_A = wide["A"].to_numpy()
+        f_B = wide["B"].to_numpy()
+        f_AB = wide[names].to_numpy().T
+        S1, ST = sobol_indices(f_A, f_B, f_AB)
+
+        n = len(f_A)
+        boot_S1 = np.empty((n_bootstrap, len(names)))
+        boot_ST = np.empty((n_bootstrap, len(names)))
+        for b in range(n_bootstrap):
+            idx = rng.integers(0, n, n)
+            boot_S1[b], boot_ST[b] = sobol_indices(f_A[idx], f_B[idx], f_AB[:, idx])
+
+        S1_low, S1_high = np.nanquantile(boot_S1, [alpha, 1 - alpha], axis=0)
+        ST_low, ST_high = np.nanquantile(boot_ST, [alpha, 1 - alpha], axis=0)
+        for i, name in enumerate(names):
+            rows.append({
+                "output": output,
+                "parameter": name,
+                "S1": S1[i],
+                "S1_low": S1_low[i],
+                "S1_high": S1_high[i],
+                "ST": ST[i],
+                "ST_low": ST_low[i],
+                "ST_high": ST_high[i]
+            })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--design", choices=["sobol", "lhs"], default="sobol")
+    parser.add_argument("--n-base", type=int, default=256,
+                        help="Base sample size N (total runs = N * (k + 2))")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--engine", choices=["event", "step"], default="event",
+                        help="Event-driven or step-by-step PensionTrustModel run mode")
+    parser.add_argument("--n-bootstrap", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs("data", exist_ok=True)
+    design_df = generate_design(args.n_base, design=args.design, seed=args.seed)
+    print(f"📐 {args.design} design: {len(design_df)} runs over {len(PARAMETERS)} parameters")
+
+    runs_df = run_design(
+        design_df,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        out_path="data/sensitivity_runs.csv",
+        event_driven=(args.engine == "event")
+    )
+    indices = analyze(runs_df, n_bootstrap=args.n_bootstrap, seed=args.seed)
+    indices.to_csv("data/sensitivity_indices.csv", index=False)
+    print(indices.to_string(index=False, float_format="%.3f"))
+    print("✅ Done! Files saved to data/sensitivity_runs.csv and data/sensitivity_indices.csv")
+
+
+if __name__ == "__main__":
+    main()